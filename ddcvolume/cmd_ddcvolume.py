@@ -16,16 +16,24 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import List
+from __future__ import annotations
 
-import argparse
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Union
+
+import contextlib
 import fcntl
+import functools
 import os
 import re
-import subprocess
 import sys
-import xdg.BaseDirectory
-import dbus
+from types import SimpleNamespace
+
+# Everything not needed by every invocation is imported lazily, as
+# Python startup time dominates short-lived calls from a keybinding.
+if TYPE_CHECKING:
+    import argparse
+    import dbus
+    import dbus.lowlevel
 
 # Workflow:
 # retrieve current volume from cache file or monitor
@@ -35,7 +43,36 @@ import dbus
 
 # FIXME: Could rewrite this to use sqlite for easier locking and robustness.
 
-I2C_RE = re.compile(r"i2c-(\d+)", re.ASCII)
+DDCUTIL_EXE = 'ddcutil'
+NOTIFY_SEND_EXE = 'notify-send'
+
+DDCUTIL_SERVICE = "com.ddcutil.DdcutilService"
+DDCUTIL_OBJECT = "/com/ddcutil/DdcutilObject"
+DDCUTIL_INTERFACE = "com.ddcutil.DdcutilInterface"
+
+VCP_VOLUME = 0x62
+
+# absolute ("50") or relative ("+5", "-5") volume
+VOLUME_RE = re.compile(r"^([+-]?)(\d{1,3})$", re.ASCII)
+
+# e.g. "VCP 62 C 50 100"
+BRIEF_VCP_RE = re.compile(rb"^VCP\s+\S+\s+\S+\s+(\d+)", re.ASCII)
+
+DDCUTIL_VERSION_RE = re.compile(r"ddcutil\s+(\d+)\.(\d+)\.(\d+)", re.ASCII)
+
+# icon to use for volumes below the given threshold
+VOLUME_ICONS = (
+    ("audio-volume-low-symbolic", 33),
+    ("audio-volume-medium-symbolic", 66),
+    ("audio-volume-high-symbolic", 101),
+)
+
+# notifications with the same x-canonical-private-synchronous tag
+# replace each other instead of stacking up
+NOTIFY_SYNC_TAG = "ddcvolume"
+
+# time the daemon waits for further volume changes before committing
+DEBOUNCE_DELAY = 0.03
 
 
 class DDCVolume:
@@ -44,146 +81,611 @@ class DDCVolume:
         self.ddcutil_exe = ddcutil_exe
         self.bus = bus
 
+        self.ddcvolume_dir = get_ddcvolume_dir()
+        self.volume_path = os.path.join(self.ddcvolume_dir, "volume")
+        self.commit_path = os.path.join(self.ddcvolume_dir, "commit")
+        self.socket_path = get_socket_path(self.ddcvolume_dir)
+        self.notify_id_path = os.path.join(self.ddcvolume_dir, "notification_id")
+
+        self.__ddcutil_iface = None
+        self.__ddcutil_edid = None
+        self.__ddcutil_iface_probed = False
+        self.__ddc_args: Optional[List[str]] = None
+
+    @property
+    def _ddc_args(self) -> List[str]:
+        """Common ddcutil command line, built on first use as it may require a version probe"""
+        if self.__ddc_args is None:
+            args = [self.ddcutil_exe, "--noverify"]
+            # --skip-ddc-checks is only available since ddcutil 2.1.0
+            if get_ddcutil_version(self.ddcvolume_dir, self.ddcutil_exe) >= (2, 1, 0):
+                args += ["--skip-ddc-checks"]
+            args += ["--sleep-multiplier", "0.1", "--bus", str(self.bus)]
+            self.__ddc_args = args
+        return self.__ddc_args
+
+    @property
+    def _ddcutil_iface(self) -> Optional[dbus.Interface]:
+        """Interface to ddcutil-service or None when it isn't available,
+        probed once per object"""
+        if not self.__ddcutil_iface_probed:
+            self.__ddcutil_iface_probed = True
+            self.__ddcutil_iface = self._connect_ddcutil_service()
+        return self.__ddcutil_iface
+
+    def _reset_ddcutil_iface(self) -> None:
+        """Makes the next call probe for ddcutil-service again"""
+        self.__ddcutil_iface_probed = False
+        self.__ddcutil_iface = None
+
+    def _connect_ddcutil_service(self) -> Optional[dbus.Interface]:
         try:
-            self.ddcvolume_dir = os.path.join(xdg.BaseDirectory.get_runtime_dir(), "ddcvolume")
-            os.mkdir(self.ddcvolume_dir)
-        except FileExistsError:
-            pass
-        except:
-            raise
+            import dbus
+        except ImportError:
+            return None
 
-    def commit(self) -> None:
-        with open(os.path.join(self.ddcvolume_dir, "commit"), "a+") as fl:
-            fcntl.flock(fl, fcntl.LOCK_EX)
+        import base64
 
-            fl.seek(0)
-            volume_str = fl.read()
+        try:
+            bus = session_bus()
+            if not bus.name_has_owner(DDCUTIL_SERVICE):
+                return None
+
+            # ddcutil-service identifies displays by EDID, not by i2c bus
+            edid = find_i2c_edid(self.bus)
+            if edid is None:
+                return None
+
+            # ddcutil-service compares against the 128 byte base block,
+            # extension blocks (e.g. CEA-861 for audio) must be cut off
+            self.__ddcutil_edid = base64.b64encode(edid[:128]).decode()
+            # follow the well-known name, so a restart of the service
+            # doesn't leave a long-running daemon with a dead proxy
+            return dbus.Interface(bus.get_object(DDCUTIL_SERVICE, DDCUTIL_OBJECT,
+                                                 follow_name_owner_changes=True),
+                                  dbus_interface=DDCUTIL_INTERFACE)
+        except dbus.DBusException:
+            # e.g. no session bus when run as root or from a system service
+            return None
+
+    def commit(self) -> None:
+        with locked_file(self.commit_path) as fd:
+            # "commit" holds the last committed volume and the inode
+            # and mtime of the "volume" file it was read from. Every
+            # write replaces "volume" with a new inode, the mtime alone
+            # is too coarse to tell back-to-back writes apart.
+            commit_str = os.read(fd, 64).split()
             try:
-                current_volume = int(volume_str)
-            except ValueError:
+                current_volume = int(commit_str[0])
+                current_stamp = (int(commit_str[1]), int(commit_str[2]))
+            except (IndexError, ValueError):
                 current_volume = None
+                current_stamp = None
+
+            try:
+                st = os.stat(self.volume_path)
+                volume_stamp = (st.st_ino, st.st_mtime_ns)
+            except FileNotFoundError:
+                volume_stamp = (0, 0)
+
+            # "volume" wasn't touched since the last commit, nothing to do
+            if volume_stamp == current_stamp:
+                return
 
             volume = self.get()
 
             if volume != current_volume:
-                subprocess.check_call(["sudo", self.ddcutil_exe, "--noverify", "--bus", str(self.bus), "setvcp", "62", "--", str(volume)])
-
-                fl.truncate(0)
-                fl.seek(0)
-                fl.write(str(volume))
-
-    def set(self, volume_str: str) -> None:
-        with open(os.path.join(self.ddcvolume_dir, "lock"), "w") as fl:
-            fcntl.flock(fl, fcntl.LOCK_EX)
-            volume = self._get()
-            volume = self._update_volume(volume, volume_str)
-            with open(os.path.join(self.ddcvolume_dir, "volume"), "w") as fout:
-                fout.write(str(volume))
+                self._set_vcp(volume)
+
+            replace_file(self.commit_path, b"%d %d %d\n" % (volume, *volume_stamp))
+
+    def set(self, volume_str: str) -> Optional[int]:
+        """Returns the new volume or None when the volume didn't change"""
+        sign, value = parse_volume(volume_str)
+        with locked_file(self.volume_path) as fd:
+            cached_volume = self._get(fd)
+            current_volume = self._refresh() if cached_volume is None else cached_volume
+            volume = self._update_volume(current_volume, sign, value)
+            if volume == current_volume:
+                if cached_volume is None:
+                    replace_file(self.volume_path, b"%d\n" % current_volume)
+                return None
+            replace_file(self.volume_path, b"%d\n" % volume)
         return volume
 
     def get(self) -> int:
-        with open(os.path.join(self.ddcvolume_dir, "lock"), "w") as fl:
-            fcntl.flock(fl, fcntl.LOCK_EX)
-            return self._get()
+        with locked_file(self.volume_path) as fd:
+            volume = self._get(fd)
+            if volume is None:
+                volume = self._refresh()
+                replace_file(self.volume_path, b"%d\n" % volume)
+            return volume
+
+    def send_notify(self, volume: int) -> None:
+        """Shows the notification via notify-send, which is cheaper than
+        setting up a D-Bus connection for a single call"""
+        import subprocess
+
+        args = [NOTIFY_SEND_EXE,
+                "-a", "ddcvolume volume control",
+                "-t", "2000",
+                "-i", volume_icon(volume),
+                "-h", "boolean:transient:true",
+                "-h", f"string:x-canonical-private-synchronous:{NOTIFY_SYNC_TAG}",
+                "-h", f"int:value:{volume}",
+                f"Volume {volume}%"]
 
-    def send_notify(self, volume: int):
-        with open(os.path.join(self.ddcvolume_dir, "notification_id"), "a+") as fl:
-            fcntl.flock(fl, fcntl.LOCK_EX)
+        try:
+            # not all notification daemons honor the synchronous hint (e.g.
+            # xfce), so also replace the previous notification by its id
+            # where notify-send is recent enough to support that
+            if not notify_send_has_print_id(self.ddcvolume_dir, NOTIFY_SEND_EXE):
+                subprocess.Popen(args)
+                return
+
+            # "notification_id" is only ever replaced atomically, so reading
+            # doesn't need the lock
+            try:
+                notify_id = int(read_state(self.notify_id_path) or 0)
+            except ValueError:
+                notify_id = 0
 
-            fl.seek(0)
-            notify_id_str = fl.read()
+            replace_args = ["-r", str(notify_id)] if notify_id != 0 else []
+            proc = subprocess.Popen(args[:1] + ["-p"] + replace_args + args[1:],
+                                    stdout=subprocess.PIPE)
 
-            if not notify_id_str:
-                notify_id = 0
-            else:
-                try:
-                    notify_id = int(notify_id_str)
-                except ValueError:
-                    notify_id = 0
-
-            if volume < 33:
-                icon = "audio-volume-low-symbolic"
-            elif volume < 66:
-                icon = "audio-volume-medium-symbolic"
-            else:
-                icon = "audio-volume-high-symbolic"
-
-            bus = dbus.SessionBus()
-            notifications = bus.get_object('org.freedesktop.Notifications',
-                                           '/org/freedesktop/Notifications')
-            notifications_iface = dbus.Interface(notifications, dbus_interface="org.freedesktop.Notifications")
-            notify_id = notifications_iface.Notify(
+            # the volume is already committed at this point, so waiting for
+            # the id only delays the exit, not the volume change
+            output, _ = proc.communicate()
+        except OSError as err:
+            print("ddcvolume: notification failed: {}".format(err), file=sys.stderr)
+            return
+
+        try:
+            new_notify_id = int(output)
+        except ValueError:
+            return
+
+        if new_notify_id != 0:
+            replace_file(self.notify_id_path, b"%d\n" % new_notify_id)
+
+    def _update_volume(self, volume: int, sign: str, value: int) -> int:
+        if sign == "+":
+            return min(volume + value, 100)
+        elif sign == "-":
+            return max(volume - value, 0)
+        else:
+            return min(value, 100)
+
+    def _get(self, fd: int) -> Optional[int]:
+        """Reads the volume from the locked "volume" file, None when it
+        isn't cached yet"""
+        try:
+            return int(os.read(fd, 64))
+        except ValueError:
+            # "volume" is created empty when first locked
+            return None
+
+    def _refresh(self) -> int:
+        """Reads the volume from the monitor, the caller is responsible
+        for storing it in the "volume" file"""
+        iface = self._ddcutil_iface
+        if iface is not None:
+            import dbus
+
+            try:
+                volume, _max_volume, _formatted, status, message = iface.GetVcp(-1, self.__ddcutil_edid, VCP_VOLUME, 0)
+            except dbus.DBusException as err:
+                self._reset_ddcutil_iface()
+                status, message = -1, str(err)
+            if status == 0:
+                return int(volume)
+            print("ddcvolume: ddcutil-service GetVcp failed, falling back to ddcutil: {}".format(message),
+                  file=sys.stderr)
+
+        import subprocess
+
+        result = subprocess.check_output(["sudo"] + self._ddc_args + ["--brief", "getvcp", "62"])
+        m = BRIEF_VCP_RE.match(result)
+        if m is None:
+            raise Exception("failed to parse ddcutil output: {!r}".format(result))
+        return int(m.group(1))
+
+    def _set_vcp(self, volume: int) -> None:
+        iface = self._ddcutil_iface
+        if iface is not None:
+            import dbus
+
+            try:
+                status, message = iface.SetVcp(-1, self.__ddcutil_edid, VCP_VOLUME, volume, 0)
+            except dbus.DBusException as err:
+                self._reset_ddcutil_iface()
+                status, message = -1, str(err)
+            if status == 0:
+                return
+            print("ddcvolume: ddcutil-service SetVcp failed, falling back to ddcutil: {}".format(message),
+                  file=sys.stderr)
+
+        import subprocess
+
+        subprocess.check_call(["sudo"] + self._ddc_args + ["setvcp", "62", "--", str(volume)])
+
+
+class DBusNotifier:
+    """Sends the volume notification over D-Bus, used by the daemon
+    where the session bus connection outlives a single notification"""
+
+    def __init__(self) -> None:
+        self.notify_id = 0
+        self._bus: Optional[dbus.Bus] = None
+        self._pending: Optional[dbus.lowlevel.PendingCall] = None
+
+    def send_notify(self, volume: int) -> None:
+        """Sends the notification asynchronously, the reply is collected
+        on the next call"""
+        # the previous reply carries the id of the notification to replace
+        if self._pending is not None:
+            self._pending.block()
+
+        import dbus
+
+        # connect on first use, so a missing session bus only costs
+        # the notification, not the daemon
+        if self._bus is None:
+            self._bus = session_bus()
+
+        self._pending = self._bus.call_async(
+            'org.freedesktop.Notifications',
+            '/org/freedesktop/Notifications',
+            'org.freedesktop.Notifications',
+            'Notify',
+            'susssasa{sv}i',
+            (
                 dbus.String("ddcvolume volume control"), # app_name
-                dbus.UInt32(notify_id), # replaces_id
-                dbus.String(icon), # app_icon
+                dbus.UInt32(self.notify_id), # replaces_id
+                dbus.String(volume_icon(volume)), # app_icon
                 dbus.String(f"Volume {volume}%"), # summary
                 dbus.String(""), # body
                 dbus.Array([]), # actions
                 dbus.Dictionary({ # hints
                     dbus.String("transient"): dbus.Boolean(True, variant_level=1),
-                    dbus.String("x-canonical-private-synchronous"): dbus.String("", variant_level=1), # not working on xcfe
+                    dbus.String("x-canonical-private-synchronous"): dbus.String(NOTIFY_SYNC_TAG, variant_level=1), # not working on xcfe
                     dbus.String("value"): dbus.Int32(volume, variant_level=1),
                 }),
-                dbus.Int32(2000))
+                dbus.Int32(2000)
+            ),
+            self._on_reply,
+            self._on_error,
+            require_main_loop=False)
 
-            fl.truncate(0)
-            fl.write(str(notify_id) + "\n")
+    def _on_reply(self, notify_id: int) -> None:
+        # an id of 0 would make the next notification a new bubble
+        # instead of replacing this one
+        if notify_id != 0:
+            self.notify_id = notify_id
 
-    def _update_volume(self, volume: int, volume_str: str) -> str:
-        if volume_str[0] == "+" or volume_str[0] == "-":
-            return max(0, min(volume + int(volume_str), 100))
-        else:
-            return max(0, min(int(volume_str), 100))
+    def _on_error(self, err: Exception) -> None:
+        print("ddcvolume: notification failed: {}".format(err), file=sys.stderr)
 
-    def _get(self) -> int:
-        try:
-            with open(os.path.join(self.ddcvolume_dir, "volume"), "r") as fin:
-                volume = int(fin.read())
-                return volume
-        except FileNotFoundError:
-            return self._refresh()
 
-    def _refresh(self):
-        result = subprocess.check_output(["sudo", self.ddcutil_exe, "--noverify", "--brief", "--bus", str(self.bus), "getvcp", "62"], text=True)
-        volume = int(result.split()[3])
-        with open(os.path.join(self.ddcvolume_dir, "volume"), "w") as fout:
-            fout.write(str(volume))
-        return volume
+def parse_volume(volume_str: str) -> Tuple[str, int]:
+    """Splits volume_str into its sign ("+", "-" or "") and value"""
+    m = VOLUME_RE.match(volume_str)
+    if m is None:
+        raise Exception("invalid volume: {!r}".format(volume_str))
+    return (m.group(1), int(m.group(2)))
+
+
+@functools.lru_cache(maxsize=1)
+def session_bus() -> dbus.Bus:
+    """Session bus connection shared by everything in the process"""
+    import dbus
+
+    return dbus.SessionBus()
+
+
+def volume_icon(volume: int) -> str:
+    for icon, threshold in VOLUME_ICONS:
+        if volume < threshold:
+            return icon
+    return VOLUME_ICONS[-1][0]
+
+
+def get_ddcvolume_dir() -> str:
+    import xdg.BaseDirectory
+
+    try:
+        ddcvolume_dir = os.path.join(xdg.BaseDirectory.get_runtime_dir(), "ddcvolume")
+        os.mkdir(ddcvolume_dir)
+    except FileExistsError:
+        pass
+    except:
+        raise
+
+    return ddcvolume_dir
+
+
+def get_socket_path(ddcvolume_dir: str) -> str:
+    """Path of the UNIX socket the daemon listens on"""
+    return os.path.join(ddcvolume_dir, "sock")
+
+
+@contextlib.contextmanager
+def locked_file(path: str) -> Iterator[int]:
+    """Opens path and holds an exclusive POSIX lock on it. As state files
+    are replaced by rename, the lock has to be retaken when path was
+    replaced while waiting for it.
+
+    The rename moves path to a new inode that others can lock right
+    away, so replace_file() on path must be the last step of the
+    critical section and happen at most once."""
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                yield fd
+                return
+        finally:
+            os.close(fd)
+
+
+def replace_file(path: str, content: bytes) -> None:
+    """Atomically replaces the content of path, see locked_file() for
+    the constraints when path is locked"""
+    # the state files are only a few bytes, so bypass the io stack
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        os.write(fd, content)
+    finally:
+        os.close(fd)
+    os.rename(tmp_path, path)
+
+
+def read_state(path: str) -> Optional[bytes]:
+    """Returns the content of a small state file or None when it doesn't exist"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        return os.read(fd, 4096)
+    finally:
+        os.close(fd)
 
 
 def find_i2c_bus(name: str) -> int:
     devices_path = "/sys/bus/i2c/devices"
-    for entry in os.scandir(devices_path):
-        m = I2C_RE.match(entry.name)
-        if m is not None:
-            with open(os.path.join(devices_path, entry.name, "name"), 'r') as fin:
-                fin_content = fin.read().rstrip()
-            if fin_content == name:
-                return int(m.group(1))
+    for entry in os.listdir(devices_path):
+        # skip the client devices, e.g. "0-0050"
+        if not entry.startswith("i2c-"):
+            continue
+
+        with open(os.path.join(devices_path, entry, "name"), 'r') as fin:
+            fin_content = fin.read(256).rstrip()
+        if fin_content == name:
+            return int(entry[len("i2c-"):])
+
+    raise Exception("failed to find i2c device: {}".format(name))
+
+
+def ddcutil_version(ddcutil_exe: str) -> Tuple[int, int, int]:
+    import subprocess
+
+    result = subprocess.check_output([ddcutil_exe, "--version"], text=True)
+    m = DDCUTIL_VERSION_RE.search(result)
+    if m is None:
+        return (0, 0, 0)
     else:
-        raise Exception("failed to find i2c device: {}".format(name))
+        return (int(m.group(1)), int(m.group(2)), int(m.group(3)))
+
+
+def get_ddcutil_version(ddcvolume_dir: str, ddcutil_exe: str) -> Tuple[int, int, int]:
+    """Like ddcutil_version(), but caches the result in the runtime
+    directory, which gets cleared on reboot"""
+    version_path = os.path.join(ddcvolume_dir, "ddcutil_version")
+    content = read_state(version_path)
+    if content is not None:
+        try:
+            # "MAJOR.MINOR.PATCH PATH", the path invalidates the entry
+            # when a different ddcutil is used
+            version_str, exe = content.rstrip(b"\n").split(b" ", 1)
+            if os.fsdecode(exe) == ddcutil_exe:
+                major, minor, patch = (int(x) for x in version_str.split(b"."))
+                return (major, minor, patch)
+        except ValueError:
+            pass
+
+    version = ddcutil_version(ddcutil_exe)
+    replace_file(version_path, b"%d.%d.%d %s\n" % (*version, os.fsencode(ddcutil_exe)))
+    return version
+
+
+def notify_send_has_print_id(ddcvolume_dir: str, notify_send_exe: str) -> bool:
+    """Returns True when notify-send supports --print-id and --replace-id
+    (libnotify 0.7.10 and later), the result is cached in the runtime
+    directory"""
+    import subprocess
+
+    cache_path = os.path.join(ddcvolume_dir, "notify_send_print_id")
+    content = read_state(cache_path)
+    if content is not None:
+        try:
+            # "0|1 PATH", the path invalidates the entry when a different
+            # notify-send is used
+            flag, exe = content.rstrip(b"\n").split(b" ", 1)
+            if os.fsdecode(exe) == notify_send_exe:
+                return flag == b"1"
+        except ValueError:
+            pass
+
+    result = subprocess.run([notify_send_exe, "--help"],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    has_print_id = b"--print-id" in result.stdout
+    replace_file(cache_path, b"%d %s\n" % (has_print_id, os.fsencode(notify_send_exe)))
+    return has_print_id
+
+
+def get_i2c_bus(ddcvolume_dir: str, name: str) -> int:
+    """Like find_i2c_bus(), but caches the result in the runtime
+    directory, which gets cleared on reboot"""
+    bus_path = os.path.join(ddcvolume_dir, "bus")
+    content = read_state(bus_path)
+    if content is not None:
+        try:
+            return int(content)
+        except ValueError:
+            pass
+
+    bus = find_i2c_bus(name)
+    replace_file(bus_path, b"%d\n" % bus)
+    return bus
 
 
-def parse_args(args: List[str]) -> argparse.Namespace:
+def find_i2c_edid(bus: int) -> Optional[bytes]:
+    """Returns the EDID of the display connected to the given i2c bus"""
+    import glob
+
+    for connector_path in glob.glob("/sys/class/drm/card*-*"):
+        ddc_path = os.path.join(connector_path, "ddc")
+        if os.path.basename(os.path.realpath(ddc_path)) == "i2c-{}".format(bus):
+            with open(os.path.join(connector_path, "edid"), 'rb') as fin:
+                edid = fin.read()
+            if edid:
+                return edid
+    return None
+
+
+def run_daemon(ddcvolume: DDCVolume) -> None:
+    """Receives volume changes over a UNIX socket and commits them once
+    no further change arrived for DEBOUNCE_DELAY seconds, so that a
+    held down volume key results in only a single setvcp."""
+    import selectors
+    import socket
+
+    socket_path = ddcvolume.socket_path
+
+    # only remove a stale socket, never the one of a running daemon
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except FileNotFoundError:
+            pass
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+        else:
+            raise Exception("ddcvolume daemon already running on {}".format(socket_path))
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock, \
+         selectors.DefaultSelector() as selector:
+        sock.bind(socket_path)
+        socket_ino = os.stat(socket_path).st_ino
+        selector.register(sock, selectors.EVENT_READ)
+
+        try:
+            notifier = DBusNotifier()
+            # commit() is cheap when nothing changed, so every request
+            # leads to one, which retries previously failed writes
+            pending = False
+            volume: Optional[int] = None
+            while True:
+                # only time out while a request is waiting to be committed
+                events = selector.select(timeout=DEBOUNCE_DELAY if pending else None)
+                if events:
+                    volume_str = sock.recv(64).decode(errors="replace")
+                    try:
+                        new_volume = ddcvolume.set(volume_str)
+                    except Exception as err:
+                        print("ddcvolume: failed to set volume: {}".format(err), file=sys.stderr)
+                        continue
+
+                    pending = True
+                    if new_volume is not None:
+                        volume = new_volume
+                elif pending:
+                    # DDC errors are routine, don't let one take down the daemon
+                    try:
+                        ddcvolume.commit()
+                    except Exception as err:
+                        print("ddcvolume: failed to commit volume: {}".format(err), file=sys.stderr)
+                    else:
+                        if volume is not None:
+                            try:
+                                notifier.send_notify(volume)
+                            except Exception as err:
+                                print("ddcvolume: notification failed: {}".format(err), file=sys.stderr)
+                    pending = False
+                    volume = None
+        finally:
+            # don't remove a socket that meanwhile belongs to someone else
+            try:
+                if os.stat(socket_path).st_ino == socket_ino:
+                    os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
+
+
+def send_to_daemon(ddcvolume_dir: str, volume_str: str) -> bool:
+    """Returns False when no daemon is running"""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.sendto(volume_str.encode(), get_socket_path(ddcvolume_dir))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+    return True
+
+
+def parse_args(args: List[str]) -> Union[argparse.Namespace, SimpleNamespace]:
+    # fast path for the plain --get/--set invocations, avoids importing argparse
+    if args == ["--get"]:
+        return SimpleNamespace(set=None, get=True, daemon=False, ddcutil=DDCUTIL_EXE)
+    elif len(args) == 2 and args[0] == "--set" and not args[1].startswith("--"):
+        return SimpleNamespace(set=args[1], get=False, daemon=False, ddcutil=DDCUTIL_EXE)
+
+    import argparse
+
     parser = argparse.ArgumentParser(description="Monitor Volume Control over DDC")
     parser.add_argument("--set", metavar="volume", type=str, help="set volume to volume")
     parser.add_argument("--get", action='store_true', help="retrieve the current volume")
-    parser.add_argument("--ddcutil", metavar="PATH", type=str, default='ddcutil', help="ddcutil executable to use")
-    return parser.parse_args(args)
+    parser.add_argument("--daemon", action='store_true', help="run in the background and coalesce --set requests")
+    parser.add_argument("--ddcutil", metavar="PATH", type=str, default=DDCUTIL_EXE, help="ddcutil executable to use")
+    opts = parser.parse_args(args)
+    if opts.daemon and (opts.set is not None or opts.get):
+        parser.error("--daemon can't be combined with --set or --get")
+    return opts
 
 
 def main():
     args = parse_args(sys.argv[1:])
-    bus = find_i2c_bus("Radeon i2c bit bus 0x92")
+
+    ddcvolume_dir = get_ddcvolume_dir()
+
+    # hand the request over to the daemon if one is running
+    if args.set is not None and not args.daemon:
+        # reject invalid input here, the daemon can't report it back
+        parse_volume(args.set)
+        if send_to_daemon(ddcvolume_dir, args.set):
+            return
+
+    bus = get_i2c_bus(ddcvolume_dir, "Radeon i2c bit bus 0x92")
     ddcutil_exe = args.ddcutil
     ddcvolume = DDCVolume(ddcutil_exe, bus)
-    if args.get:
+    if args.daemon:
+        run_daemon(ddcvolume)
+    elif args.get:
         print(ddcvolume.get())
     elif args.set is not None:
         volume_str = args.set
         volume = ddcvolume.set(volume_str)
-        ddcvolume.send_notify(volume)
+        # always commit, so a previously failed write gets retried,
+        # commit() is cheap when nothing is pending
         ddcvolume.commit()
+        if volume is not None:
+            # the notification is only cosmetic, so it comes last
+            ddcvolume.send_notify(volume)
 
 
 if __name__ == "__main__":
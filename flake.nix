@@ -19,11 +19,14 @@
             src = ./.;
             postPatch = ''
                 substituteInPlace ddcvolume/cmd_ddcvolume.py \
-                   --replace "default='ddcutil'" \
-                             "default='${pkgs.ddcutil}/bin/ddcutil'"
+                   --replace "DDCUTIL_EXE = 'ddcutil'" \
+                             "DDCUTIL_EXE = '${pkgs.ddcutil}/bin/ddcutil'" \
+                   --replace "NOTIFY_SEND_EXE = 'notify-send'" \
+                             "NOTIFY_SEND_EXE = '${pkgs.libnotify}/bin/notify-send'"
             '';
             buildInputs = [
               pkgs.ddcutil
+              pkgs.libnotify
             ];
             propagatedBuildInputs = [
               pkgs.python3Packages.pyxdg